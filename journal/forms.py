@@ -1,9 +1,54 @@
 from django import forms
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from .models import Trade, Symbol, Mistake
+from .models import Trade, Symbol, Mistake, FUTURE_DATE_GRACE
 import pytz
 
 
+MISTAKE_CHOICES_CACHE_KEY = 'journal:mistake_choices'
+
+
+def get_mistake_choices():
+    """
+    Return (id, name) choices for the mistakes checkboxes, ordered by category.
+
+    Mistakes are seeded once by populate_mistakes and rarely change, so the list
+    is cached; journal.signals clears it whenever a Mistake is saved or deleted.
+    """
+    return cache.get_or_set(
+        MISTAKE_CHOICES_CACHE_KEY,
+        lambda: list(Mistake.objects.order_by('category', 'name').values_list('id', 'name')),
+        60 * 60,
+    )
+
+
+SYMBOL_CACHE_KEY = 'journal:symbol:{}'
+
+# Separators allowed in symbols (BTC-USD, BRK.B); removed before the isalnum() check
+SYMBOL_SEPARATORS = str.maketrans('', '', '-_.')
+
+
+def get_or_create_symbol(symbol_name):
+    """
+    Symbol.objects.get_or_create() with the symbol cached by ticker, so repeat
+    trades on the same symbol skip the lookup. journal.signals clears the entry
+    when the Symbol is renamed, saved or deleted.
+    """
+    key = SYMBOL_CACHE_KEY.format(symbol_name)
+    symbol = cache.get(key)
+    if symbol is not None:
+        return symbol, False
+
+    symbol, created = Symbol.objects.get_or_create(
+        symbol=symbol_name,
+        defaults={'asset_type': 'stock'}  # Default to stock
+    )
+    # Only cache rows that are committed, never a pk a rollback undoes
+    transaction.on_commit(lambda: cache.set(key, symbol, 60 * 60))
+    return symbol, created
+
+
 class TradeCreateForm(forms.ModelForm):
     """
     Form for creating new trades in the journal.
@@ -76,18 +121,21 @@ class TradeCreateForm(forms.ModelForm):
         """Initialize form with current datetime as default for entry_date."""
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
+
+        # Resolve the user's timezone once; clean() reuses it
+        if self.user and hasattr(self.user, 'userprofile'):
+            self._user_tz = pytz.timezone(self.user.userprofile.timezone)
+        else:
+            self._user_tz = pytz.UTC
+
         # Set default entry date to now
         if not self.instance.pk:  # Only for new trades
-            if self.user and hasattr(self.user , 'userprofile'):
-                user_tz = self.user.userprofile.timezone
-                import pytz
-                tz = pytz.timezone(user_tz)
-                self.fields['entry_date'].initial = timezone.now().astimezone(tz)
-            else:
-                self.fields['entry_date'].initial = timezone.now()
-
-        # Organize mistakes by category for better UX
+            self.fields['entry_date'].initial = timezone.now().astimezone(self._user_tz)
+
+        # Organize mistakes by category for better UX. The queryset is only used
+        # to validate submitted ids; the checkboxes render from cached choices.
         self.fields['mistakes'].queryset = Mistake.objects.all().order_by('category', 'name')
+        self.fields['mistakes'].choices = get_mistake_choices()
         self.fields['mistakes'].required = False
 
     def clean(self):
@@ -98,11 +146,7 @@ class TradeCreateForm(forms.ModelForm):
         quantity = cleaned_data.get('quantity')
         entry_price = cleaned_data.get('entry_price')
 
-        # Get user's timezone
-        if self.user and hasattr(self.user, 'userprofile'):
-            user_tz = pytz.timezone(self.user.userprofile.timezone)
-        else:
-            user_tz = pytz.UTC
+        user_tz = self._user_tz
 
         # Make naive datetimes aware
         if entry_date and timezone.is_naive(entry_date):
@@ -112,10 +156,10 @@ class TradeCreateForm(forms.ModelForm):
             exit_date = timezone.make_aware(exit_date, timezone=user_tz)
 
         # Compare with now in user's timezone
-        now_user = timezone.now().astimezone(user_tz)
-        if entry_date and entry_date > now_user + timezone.timedelta(minutes=1):
+        latest_allowed = timezone.now().astimezone(user_tz) + FUTURE_DATE_GRACE
+        if entry_date and entry_date > latest_allowed:
             raise forms.ValidationError("Entry date cannot be in the future (user timezone).")
-        if exit_date and exit_date > now_user + timezone.timedelta(minutes=1):
+        if exit_date and exit_date > latest_allowed:
             raise forms.ValidationError("Exit date cannot be in the future (user timezone).")
 
         # Exit date/price logical checks
@@ -154,7 +198,7 @@ class TradeCreateForm(forms.ModelForm):
                 raise forms.ValidationError("Symbol cannot be empty.")
             if len(symbol_input) > 20:
                 raise forms.ValidationError("Symbol name is too long (max 20 characters).")
-            if not symbol_input.replace('-', '').replace('_', '').replace('.', '').isalnum():
+            if not symbol_input.translate(SYMBOL_SEPARATORS).isalnum():
                 raise forms.ValidationError("Symbol contains invalid characters. Use only letters, numbers, hyphens, underscores, and dots.")
             
         return cleaned_data
@@ -168,10 +212,7 @@ class TradeCreateForm(forms.ModelForm):
 
         # Get or create the symbol
         symbol_name = self.cleaned_data['symbol_input'].upper().strip()
-        symbol, created = Symbol.objects.get_or_create(
-            symbol=symbol_name,
-            defaults={'asset_type': 'stock'}  # Default to stock
-        )
+        symbol, created = get_or_create_symbol(symbol_name)
 
         # Create the trade instance
         trade = super().save(commit=False)
@@ -1,12 +1,27 @@
+from collections import Counter, defaultdict
 from django.core.management.base import BaseCommand
-from django.db.models import Count, Sum, Avg, Q, F
+from django.db.models import Count, Sum, Avg, Q, Exists, OuterRef
 from journal.models import Trade, Mistake
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+
+# Mistakes counted as emotional in the emotion vs win rate analysis
+EMOTIONAL_MISTAKES = [
+    'FOMO trading', 'Revenge trading', 'Overconfidence',
+    'Hesitation', 'Confirmation bias'
+]
 
 
 class Command(BaseCommand):
     help = 'Run analytics queries on trading journal data'
 
+    @cached_property
+    def emotional_mistake_ids(self):
+        """IDs of the emotional mistakes, looked up once per command run."""
+        return list(
+            Mistake.objects.filter(name__in=EMOTIONAL_MISTAKES).values_list('id', flat=True)
+        )
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--user',
@@ -24,12 +39,11 @@ class Command(BaseCommand):
             except User.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f'User "{username}" not found'))
         else:
-            # Analyze all users
-            users = User.objects.all()
+            # Analyze all users that have at least one trade
+            users = User.objects.filter(Exists(Trade.objects.filter(user=OuterRef('pk'))))
             for user in users:
-                if user.trades.exists():
-                    self.stdout.write(f'\n=== ANALYZING USER: {user.username} ===')
-                    self.run_analytics(user)
+                self.stdout.write(f'\n=== ANALYZING USER: {user.username} ===')
+                self.run_analytics(user)
 
     def run_analytics(self, user):
         """Run all analytics queries for a user"""
@@ -51,20 +65,23 @@ class Command(BaseCommand):
         Rule-followed = Closed trades (both entry and exit properly executed)
         Rule-broken = Open trades (position not properly closed)
         """
-        trades = user.trades.all()
-
         # Rule-followed: Closed trades (have both entry and exit)
-        closed_trades = trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-        closed_count = closed_trades.count()
-        closed_pnl = sum((trade.pnl or 0) for trade in closed_trades)
-
+        closed = Q(is_closed=True)
         # Rule-broken: Open trades (missing exit data)
-        open_trades = trades.filter(
-            Q(exit_price__isnull=True) | Q(exit_date__isnull=True)
+        open_ = Q(is_closed=False)
+
+        # Both groups in one pass. Open trades have unrealized P&L (could be
+        # positive or negative); trades without an exit price add nothing.
+        stats = user.trades.aggregate(
+            closed_count=Count('id', filter=closed),
+            closed_pnl=Sum('pnl', filter=closed),
+            open_count=Count('id', filter=open_),
+            open_pnl=Sum('pnl', filter=open_),
         )
-        open_count = open_trades.count()
-        # Open trades have unrealized P&L (could be positive or negative)
-        open_pnl = sum((trade.pnl or 0) for trade in open_trades)
+        closed_count = stats['closed_count']
+        closed_pnl = stats['closed_pnl'] or 0
+        open_count = stats['open_count']
+        open_pnl = stats['open_pnl'] or 0
 
         self.stdout.write(f'  Closed trades (Rule-followed): {closed_count} trades, P&L: ${closed_pnl:.2f}')
         self.stdout.write(f'  Open trades (Rule-broken): {open_count} trades, Unrealized P&L: ${open_pnl:.2f}')
@@ -85,36 +102,32 @@ class Command(BaseCommand):
         """
         trades = user.trades.all()
 
-        # Define emotional mistake categories
-        emotional_mistakes = [
-            'FOMO trading', 'Revenge trading', 'Overconfidence',
-            'Hesitation', 'Confirmation bias'
-        ]
-
-        # Get emotional mistake objects
-        emotion_mistake_objects = Mistake.objects.filter(name__in=emotional_mistakes)
+        # Semi-join on the trade/mistake table: no duplicate rows, so no DISTINCT
+        has_emotional_mistake = Exists(Trade.mistakes.through.objects.filter(
+            trade=OuterRef('pk'), mistake_id__in=self.emotional_mistake_ids
+        ))
 
         # Trades with emotional mistakes
-        emotional_trades = trades.filter(mistakes__in=emotion_mistake_objects).distinct()
-        emotional_count = emotional_trades.count()
+        emotional_trades = trades.filter(has_emotional_mistake)
+        emotional_count = emotional_trades.cached_count()
 
         # Trades without emotional mistakes
-        non_emotional_trades = trades.exclude(mistakes__in=emotion_mistake_objects).distinct()
-        non_emotional_count = non_emotional_trades.count()
+        non_emotional_trades = trades.filter(~has_emotional_mistake)
+        non_emotional_count = non_emotional_trades.cached_count()
 
         # Calculate win rates (profitable closed trades)
         def calculate_win_rate(trade_queryset):
-            closed = trade_queryset.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-            if closed.count() == 0:
-                return 0, 0
+            closed = trade_queryset.filter(is_closed=True)
 
-            # Wins: trades where we made money
-            wins = closed.filter(
-                Q(side='buy', exit_price__gt=F('entry_price')) |
-                Q(side='sell', exit_price__lt=F('entry_price'))
-            ).count()
+            # Wins: trades where we made money (quantity is always positive, so
+            # this matches exit above/below entry for buys/sells). Both counts
+            # come from one query.
+            stats = closed.aggregate(
+                total=Count('id'),
+                wins=Count('id', filter=Q(pnl__gt=0)),
+            )
 
-            return wins, closed.count()
+            return stats['wins'], stats['total']
 
         emotion_wins, emotion_total = calculate_win_rate(emotional_trades)
         non_emotion_wins, non_emotion_total = calculate_win_rate(non_emotional_trades)
@@ -134,33 +147,36 @@ class Command(BaseCommand):
         Analyze the frequency of different mistake types across all trades.
         Shows which mistakes occur most often and their impact.
         """
-        trades = user.trades.all()
-
-        # Get all mistakes and their frequencies
-        mistake_stats = []
-
-        for mistake in Mistake.objects.all():
-            # Count trades with this mistake
-            trade_count = trades.filter(mistakes=mistake).count()
-
-            if trade_count > 0:
-                # Calculate average P&L for trades with this mistake
-                mistake_trades = trades.filter(mistakes=mistake)
-                closed_mistake_trades = mistake_trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
+        # One row per (mistake, trade) tag. The mistake table is small, so tallying
+        # these in Python is cheaper than GROUP BY joins back to the trades.
+        # The rows are streamed, so memory stays flat however many trades there are.
+        tags = Trade.mistakes.through.objects.filter(trade__user=user).values_list(
+            'mistake_id', 'trade__pnl', 'trade__is_closed'
+        )
 
-                total_pnl = sum((trade.pnl or 0) for trade in closed_mistake_trades)
-                avg_pnl = total_pnl / closed_mistake_trades.count() if closed_mistake_trades.count() > 0 else 0
+        frequency = Counter()
+        closed_count = Counter()
+        closed_pnl = defaultdict(int)
+        for mistake_id, pnl, is_closed in tags.iterator(chunk_size=500):
+            frequency[mistake_id] += 1
+            if is_closed:
+                closed_count[mistake_id] += 1
+                closed_pnl[mistake_id] += pnl
 
-                mistake_stats.append({
-                    'name': mistake.name,
-                    'category': mistake.get_category_display(),
-                    'frequency': trade_count,
-                    'avg_pnl': avg_pnl,
-                    'total_pnl': total_pnl
-                })
+        mistakes = Mistake.objects.only('name', 'category').in_bulk(frequency.keys())
 
-        # Sort by frequency (most common first)
-        mistake_stats.sort(key=lambda x: x['frequency'], reverse=True)
+        mistake_stats = []
+        for mistake in sorted(mistakes.values(), key=lambda m: (-frequency[m.id], m.category, m.name)):
+            total_pnl = closed_pnl[mistake.id]
+            avg_pnl = total_pnl / closed_count[mistake.id] if closed_count[mistake.id] > 0 else 0
+
+            mistake_stats.append({
+                'name': mistake.name,
+                'category': mistake.get_category_display(),
+                'frequency': frequency[mistake.id],
+                'avg_pnl': avg_pnl,
+                'total_pnl': total_pnl
+            })
 
         self.stdout.write('  Top 10 most frequent mistakes:')
         for i, stat in enumerate(mistake_stats[:10], 1):
@@ -170,16 +186,14 @@ class Command(BaseCommand):
         if not mistake_stats:
             self.stdout.write('    No mistakes tagged in trades yet.')
 
-        # Category breakdown
+        # Category breakdown, from the same tallies
         self.stdout.write('\n  Mistakes by category:')
         category_stats = {}
         for stat in mistake_stats:
-            cat = stat['category']
-            if cat not in category_stats:
-                category_stats[cat] = {'count': 0, 'total_pnl': 0}
-            category_stats[cat]['count'] += stat['frequency']
-            category_stats[cat]['total_pnl'] += stat['total_pnl']
+            data = category_stats.setdefault(stat['category'], {'count': 0, 'total_pnl': 0})
+            data['count'] += stat['frequency']
+            data['total_pnl'] += stat['total_pnl']
 
-        for category, data in sorted(category_stats.items(), key=lambda x: x[1]['count'], reverse=True):
+        for category, data in sorted(category_stats.items(), key=lambda x: (-x[1]['count'], x[0])):
             avg_pnl = data['total_pnl'] / data['count'] if data['count'] > 0 else 0
-            self.stdout.write(f'    {category}: {data["count"]} occurrences, Avg P&L: ${avg_pnl:.2f}')
\ No newline at end of file
+            self.stdout.write(f'    {category}: {data["count"]} occurrences, Avg P&L: ${avg_pnl:.2f}')
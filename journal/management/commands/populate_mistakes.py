@@ -1,4 +1,6 @@
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
+from journal.forms import MISTAKE_CHOICES_CACHE_KEY
 from journal.models import Mistake
 
 
@@ -57,17 +59,18 @@ class Command(BaseCommand):
             ('Cost ignorance', 'Did not account for fees, spreads, commissions', 'other'),
         ]
 
-        created_count = 0
-        for name, description, category in mistakes_data:
-            mistake, created = Mistake.objects.get_or_create(
-                name=name,
-                defaults={
-                    'description': description,
-                    'category': category
-                }
-            )
-            if created:
-                created_count += 1
+        # Insert everything in one statement; names that already exist are skipped
+        existing_count = Mistake.objects.count()
+        Mistake.objects.bulk_create(
+            [
+                Mistake(name=name, description=description, category=category)
+                for name, description, category in mistakes_data
+            ],
+            ignore_conflicts=True,
+        )
+        created_count = Mistake.objects.count() - existing_count
+        # bulk_create sends no post_save signals, so clear the form choices here
+        cache.delete(MISTAKE_CHOICES_CACHE_KEY)
 
         self.stdout.write(
             self.style.SUCCESS(f'Successfully populated {created_count} trading mistakes')
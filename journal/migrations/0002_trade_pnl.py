@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-15 15:38
+
+from django.db import migrations, models
+
+
+def backfill_pnl(apps, schema_editor):
+    Trade = apps.get_model("journal", "Trade")
+    Trade.objects.update(
+        pnl=models.Case(
+            models.When(
+                side="buy",
+                then=(models.F("exit_price") - models.F("entry_price"))
+                * models.F("quantity"),
+            ),
+            default=(models.F("entry_price") - models.F("exit_price"))
+            * models.F("quantity"),
+            output_field=models.DecimalField(max_digits=30, decimal_places=8),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="pnl",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=8,
+                editable=False,
+                help_text="Profit/loss of the trade (null for open trades)",
+                max_digits=30,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_pnl, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(fields=["user", "pnl"], name="trade_user_pnl_idx"),
+        ),
+    ]
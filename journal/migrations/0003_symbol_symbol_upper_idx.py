@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-15 15:41
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0002_trade_pnl"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="symbol",
+            index=models.Index(
+                django.db.models.functions.text.Upper("symbol"), name="symbol_upper_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-15 15:53
+
+from django.db import migrations, models
+
+
+def backfill_is_closed(apps, schema_editor):
+    Trade = apps.get_model("journal", "Trade")
+    Trade.objects.filter(exit_price__isnull=False, exit_date__isnull=False).update(
+        is_closed=True
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0003_symbol_symbol_upper_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="is_closed",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Whether the trade has both an exit price and an exit date",
+            ),
+        ),
+        migrations.RunPython(backfill_is_closed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-15 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("journal", "0004_trade_is_closed"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                condition=models.Q(("is_closed", True)),
+                fields=["user", "-entry_date"],
+                name="trade_user_entry_closed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trade",
+            index=models.Index(
+                condition=models.Q(("is_closed", False)),
+                fields=["user", "-entry_date"],
+                name="trade_user_entry_open_idx",
+            ),
+        ),
+    ]
@@ -1,8 +1,16 @@
-from django.db import models
+import hashlib
+import uuid
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models.functions import Upper
 from django.utils import timezone
 
+# Allow for a small grace period to account for timing differences when
+# rejecting entry/exit dates in the future
+FUTURE_DATE_GRACE = timezone.timedelta(minutes=1)
+
 
 class Mistake(models.Model):
     """
@@ -74,10 +82,158 @@ class Symbol(models.Model):
 
     class Meta:
         ordering = ['symbol']
+        indexes = [
+            # Serves case-insensitive lookups such as symbol__iexact, which
+            # compare UPPER(symbol) on PostgreSQL
+            models.Index(Upper('symbol'), name='symbol_upper_idx'),
+        ]
 
     def __str__(self):
         return f"{self.symbol}"
 
+    def save(self, *args, **kwargs):
+        """Store symbols in the same normalized form TradeCreateForm looks them up by."""
+        self.symbol = self.symbol.strip().upper()
+        super().save(*args, **kwargs)
+
+
+def pnl_expression():
+    """
+    SQL equivalent of Trade.calculate_pnl(), for with_pnl() and for keeping the
+    stored pnl in sync on bulk update(). NULL for trades without an exit price.
+    """
+    exit_price = models.F('exit_price')
+    entry_price = models.F('entry_price')
+    quantity = models.F('quantity')
+    return models.Case(
+        models.When(side='buy', then=(exit_price - entry_price) * quantity),
+        default=(entry_price - exit_price) * quantity,
+        output_field=models.DecimalField(max_digits=30, decimal_places=8),
+    )
+
+
+def is_closed_expression():
+    """SQL equivalent of the stored Trade.is_closed flag."""
+    return models.Case(
+        models.When(exit_price__isnull=False, exit_date__isnull=False, then=models.Value(True)),
+        default=models.Value(False),
+        output_field=models.BooleanField(),
+    )
+
+
+TRADES_VERSION_CACHE_KEY = 'journal:trades_version'
+
+
+def get_trades_version():
+    """Token identifying the current state of the trades table for caching."""
+    return cache.get_or_set(TRADES_VERSION_CACHE_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_trade_counts():
+    """Expire every cached_count() result; called by journal.signals on writes."""
+    cache.set(TRADES_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+TRADE_LIST_VERSION_CACHE_KEY = 'journal:trade_list_version:{}'
+
+
+def get_trade_list_version(user):
+    """
+    Token identifying the state of a user's trades for the cached trade_list
+    fragment. Deleted by invalidate_trade_list() when one of their trades changes.
+    """
+    return cache.get_or_set(
+        TRADE_LIST_VERSION_CACHE_KEY.format(user.pk), lambda: uuid.uuid4().hex, None
+    )
+
+
+def invalidate_trade_list(user_ids):
+    """Expire the cached trade_list fragments of the given users."""
+    cache.delete_many([TRADE_LIST_VERSION_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+USER_SYMBOLS_CACHE_KEY = 'journal:user_symbols:{}'
+
+
+def get_user_symbols(user):
+    """
+    Return the distinct symbols a user has traded, for the filter dropdown.
+    Cached per user; invalidate_user_symbols() clears it when their trades change.
+    """
+    return cache.get_or_set(
+        USER_SYMBOLS_CACHE_KEY.format(user.pk),
+        lambda: list(
+            user.trades.values_list('symbol__symbol', flat=True).distinct().order_by('symbol__symbol')
+        ),
+        5 * 60,
+    )
+
+
+def invalidate_user_symbols(user_ids):
+    """Expire the cached symbol dropdowns of the given users."""
+    cache.delete_many([USER_SYMBOLS_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+class TradeQuerySet(models.QuerySet):
+    """Query helpers shared by Trade.objects and user.trades."""
+
+    def with_pnl(self):
+        """Annotate each trade with `pnl_db`, P&L recomputed from its prices."""
+        return self.annotate(pnl_db=pnl_expression())
+
+    def update(self, **kwargs):
+        """
+        Bulk updates skip Trade.save() and its signals, so recompute the stored
+        pnl and is_closed in the database whenever a field they derive from
+        changes, and expire cached counts and the owners' cached trade lists
+        and symbol dropdowns.
+        """
+        derived = {}
+        if 'pnl' not in kwargs and self.model.PNL_SOURCE_FIELDS & kwargs.keys():
+            derived['pnl'] = pnl_expression()
+        if 'is_closed' not in kwargs and self.model.CLOSED_SOURCE_FIELDS & kwargs.keys():
+            derived['is_closed'] = is_closed_expression()
+
+        moves_user = 'user' in kwargs or 'user_id' in kwargs
+        if not derived and not moves_user:
+            # Only the owners are needed, to expire their cached trade lists
+            user_ids = set(self.order_by().values_list('user_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+        else:
+            # The update may change which rows this queryset matches, so pin them first
+            with transaction.atomic(using=self.db):
+                pinned = dict(self.order_by().values_list('pk', 'user_id'))
+                rows = super().update(**kwargs)
+                updated = self.model._base_manager.using(self.db).filter(pk__in=pinned)
+                if derived and pinned:
+                    updated.update(**derived)
+                user_ids = set(pinned.values())
+                if moves_user:
+                    # Trades moved to another user change that user's list too
+                    user_ids.update(updated.order_by().values_list('user_id', flat=True).distinct())
+
+        if rows:
+            invalidate_trade_counts()
+            invalidate_trade_list(user_ids)
+            invalidate_user_symbols(user_ids)
+        return rows
+
+    def cached_count(self, timeout=60):
+        """
+        count() backed by Django's cache, for analytics counts over a whole journal.
+
+        Results are keyed on the query's SQL and the trades version, so any
+        trade save/delete, bulk update() or mistake tagging change makes them
+        stale at once.
+        """
+        try:
+            sql, params = self.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        digest = hashlib.md5(f'{sql}:{params}'.encode()).hexdigest()
+        key = f'journal:trade_count:{get_trades_version()}:{digest}'
+        return cache.get_or_set(key, self.count, timeout)
+
 
 class Trade(models.Model):
     """
@@ -151,9 +307,33 @@ class Trade(models.Model):
         help_text="Mistakes made in this trade (for behavioral learning)"
     )
 
-    # Calculated field (could be computed in views/queries)
-    @property
-    def pnl(self):
+    # Stored profit/loss so analytics can Sum('pnl') directly.
+    # Kept in sync with the prices by save(); null for open trades.
+    pnl = models.DecimalField(
+        max_digits=30,
+        decimal_places=8,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Profit/loss of the trade (null for open trades)"
+    )
+
+    # Stored so open/closed filters are a single column, served by the
+    # partial (user, entry_date) indexes below. Kept in sync by save().
+    is_closed = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Whether the trade has both an exit price and an exit date"
+    )
+
+    objects = TradeQuerySet.as_manager()
+
+    # Fields the stored pnl is derived from
+    PNL_SOURCE_FIELDS = {'side', 'quantity', 'entry_price', 'exit_price'}
+    # Fields the stored is_closed flag is derived from
+    CLOSED_SOURCE_FIELDS = {'exit_price', 'exit_date'}
+
+    def calculate_pnl(self):
         """
         Calculate profit/loss for closed trades.
         Returns None for open trades.
@@ -166,30 +346,50 @@ class Trade(models.Model):
         else:  # sell/short
             return (self.entry_price - self.exit_price) * self.quantity
 
-    @property
-    def is_closed(self):
-        """Check if this trade has been closed."""
-        return self.exit_price is not None and self.exit_date is not None
-
     class Meta:
         ordering = ['-entry_date']  # Most recent trades first
         indexes = [
             models.Index(fields=['user', '-entry_date']),
             models.Index(fields=['symbol', '-entry_date']),
+            # A user's closed or open trades, most recent first
+            models.Index(
+                fields=['user', '-entry_date'],
+                name='trade_user_entry_closed_idx',
+                condition=models.Q(is_closed=True),
+            ),
+            models.Index(
+                fields=['user', '-entry_date'],
+                name='trade_user_entry_open_idx',
+                condition=models.Q(is_closed=False),
+            ),
+            # Win/loss lookups on the stored P&L
+            models.Index(fields=['user', 'pnl'], name='trade_user_pnl_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        """Recalculate the stored pnl and is_closed before saving."""
+        self.pnl = self.calculate_pnl()
+        self.is_closed = self.exit_price is not None and self.exit_date is not None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if self.PNL_SOURCE_FIELDS & update_fields:
+                update_fields.add('pnl')
+            if self.CLOSED_SOURCE_FIELDS & update_fields:
+                update_fields.add('is_closed')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def clean(self):
         """Validate trade data"""
-        now = timezone.now()
+        latest_allowed = timezone.now() + FUTURE_DATE_GRACE
 
         if self.entry_date:
-            # Allow for a small grace period (e.g., 1 minute) to account for timing differences
-            if self.entry_date > now + timezone.timedelta(minutes=1):
+            if self.entry_date > latest_allowed:
                 raise ValidationError("Entry date cannot be in the future.")
 
         if self.exit_date:
-            # Allow for a small grace period (e.g., 1 minute) to account for timing differences
-            if self.exit_date > now + timezone.timedelta(minutes=1):
+            if self.exit_date > latest_allowed:
                 raise ValidationError("Exit date cannot be in the future.")
 
         if self.entry_date and self.exit_date and self.exit_date < self.entry_date:
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .forms import MISTAKE_CHOICES_CACHE_KEY, SYMBOL_CACHE_KEY
+from .models import (
+    Mistake, Symbol, Trade, invalidate_trade_counts, invalidate_trade_list, invalidate_user_symbols,
+)
+
+
+@receiver([post_save, post_delete], sender=Mistake)
+def clear_mistake_choices(sender, **kwargs):
+    """Drop the cached form choices so new/renamed mistakes show up."""
+    cache.delete(MISTAKE_CHOICES_CACHE_KEY)
+
+
+@receiver(pre_save, sender=Symbol)
+def clear_renamed_symbol(sender, instance, **kwargs):
+    """Stop get_or_create_symbol() handing out a Symbol under its old ticker."""
+    if instance.pk is None:
+        return
+    old_symbol = Symbol.objects.filter(pk=instance.pk).values_list('symbol', flat=True).first()
+    if old_symbol is not None and old_symbol != instance.symbol:
+        cache.delete(SYMBOL_CACHE_KEY.format(old_symbol))
+
+
+@receiver([post_save, post_delete], sender=Symbol)
+def clear_cached_symbol(sender, instance, **kwargs):
+    """Stop get_or_create_symbol() handing out a changed or deleted Symbol."""
+    cache.delete(SYMBOL_CACHE_KEY.format(instance.symbol))
+
+
+def trade_owner_ids(instance):
+    """Ids of the users with trades on a Symbol or tagged with a Mistake."""
+    return set(instance.trades.order_by().values_list('user_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Symbol)
+def clear_symbol_trade_lists(sender, instance, created, **kwargs):
+    """Expire the cached trade lists and dropdowns showing a changed Symbol."""
+    if created:
+        return
+    user_ids = trade_owner_ids(instance)
+    invalidate_trade_list(user_ids)
+    invalidate_user_symbols(user_ids)
+
+
+@receiver([post_save, pre_delete], sender=Mistake)
+def clear_mistake_trade_lists(sender, instance, **kwargs):
+    """
+    Expire the cached trade lists showing a changed or deleted Mistake.
+    Deletes are caught before the tags cascade away with no m2m signal.
+    """
+    if kwargs.get('created'):
+        return
+    invalidate_trade_list(trade_owner_ids(instance))
+
+
+@receiver([post_save, post_delete], sender=Trade)
+@receiver(m2m_changed, sender=Trade.mistakes.through)
+def clear_trade_counts(sender, **kwargs):
+    """Expire cached trade counts whenever trades or their mistakes change."""
+    invalidate_trade_counts()
+
+
+@receiver([post_save, post_delete], sender=Trade)
+def clear_user_symbols(sender, instance, **kwargs):
+    """Refresh the owner's symbol filter dropdown."""
+    invalidate_user_symbols([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=Trade)
+def clear_trade_list(sender, instance, **kwargs):
+    """Expire the owner's cached trade_list fragments."""
+    invalidate_trade_list([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Trade.mistakes.through)
+def clear_trade_list_mistakes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Expire cached trade_list fragments when trades are (un)tagged."""
+    if not reverse:
+        if not action.startswith('post_'):
+            return
+        user_ids = {instance.user_id}
+    elif action == 'pre_clear':
+        # Clearing from the mistake side passes no pks, so look them up first
+        user_ids = set(instance.trades.values_list('user_id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        user_ids = set(Trade.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+    else:
+        return
+    invalidate_trade_list(user_ids)
@@ -1,17 +1,28 @@
+from datetime import datetime, timezone as dt_timezone
+from contextlib import redirect_stdout
+from io import StringIO
 from django.test import TestCase
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .models import Trade, Symbol, Mistake
-from .forms import TradeCreateForm
+from .forms import TradeCreateForm, get_or_create_symbol
 
 
 class TradeModelTest(TestCase):
     """Test Trade model validation and functionality"""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass')
+        cls.symbol = Symbol.objects.create(symbol='AAPL', name='Apple Inc.')
+
     def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='testpass')
-        self.symbol = Symbol.objects.create(symbol='AAPL', name='Apple Inc.')
+        # Cached counts would otherwise outlive each test's rolled-back rows
+        cache.clear()
 
     def test_trade_validation_positive_quantity(self):
         """Test that quantity must be positive"""
@@ -88,8 +99,79 @@ class TradeModelTest(TestCase):
         expected_pnl = (110.00 - 100.00) * 100  # $1,000 profit
         self.assertEqual(trade.pnl, expected_pnl)
 
+    def test_trade_pnl_updated_on_save(self):
+        """Test stored P&L is recalculated when a trade is closed"""
+        trade = Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        self.assertIsNone(trade.pnl)
+
+        trade.exit_price = 110.00
+        trade.exit_date = timezone.now()
+        trade.save(update_fields=['exit_price', 'exit_date'])
+        trade.refresh_from_db()
+        self.assertEqual(trade.pnl, 1000)
+
+    def test_trade_pnl_updated_by_queryset_update(self):
+        """Test stored P&L is recalculated by QuerySet.update()"""
+        trade = Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='sell',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+
+        Trade.objects.filter(exit_price__isnull=True).update(exit_price=90.00, exit_date=timezone.now())
+        trade.refresh_from_db()
+        self.assertEqual(trade.pnl, 1000)
+
+    def test_trade_pnl_annotation(self):
+        """Test with_pnl() matches the stored pnl"""
+        for side, entry_price, exit_price in [('buy', 100.00, 110.00), ('sell', 110.00, 100.00), ('buy', 100.00, None)]:
+            Trade.objects.create(
+                user=self.user,
+                symbol=self.symbol,
+                side=side,
+                quantity=100,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                entry_date=timezone.now(),
+                exit_date=timezone.now() if exit_price else None
+            )
+
+        for trade in Trade.objects.with_pnl():
+            self.assertEqual(trade.pnl_db, trade.pnl)
+
+    def test_trade_cached_count_invalidated(self):
+        """Test cached_count() picks up newly created trades"""
+        trades = Trade.objects.filter(user=self.user)
+        self.assertEqual(trades.cached_count(), 0)
+
+        Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        self.assertEqual(trades.cached_count(), 1)
+        self.assertEqual(trades.filter(mistakes__in=[]).cached_count(), 0)
+
+        open_trades = trades.filter(is_closed=False)
+        self.assertEqual(open_trades.cached_count(), 1)
+        trades.update(exit_price=110.00, exit_date=timezone.now())
+        self.assertEqual(open_trades.cached_count(), 0)
+
     def test_trade_is_closed(self):
-        """Test is_closed property"""
+        """Test is_closed flag"""
         # Open trade
         open_trade = Trade.objects.create(
             user=self.user,
@@ -114,12 +196,32 @@ class TradeModelTest(TestCase):
         )
         self.assertTrue(closed_trade.is_closed)
 
+    def test_trade_is_closed_updated_by_queryset_update(self):
+        """Test stored is_closed is recalculated by QuerySet.update()"""
+        trade = Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+
+        Trade.objects.filter(is_closed=False).update(exit_price=110.00, exit_date=timezone.now())
+        trade.refresh_from_db()
+        self.assertTrue(trade.is_closed)
+
 
 class TradeFormTest(TestCase):
     """Test TradeCreateForm validation"""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass')
+
     def setUp(self):
-        self.user = User.objects.create_user(username='testuser', password='testpass')
+        # Cached symbols/choices would otherwise outlive each test's rolled-back rows
+        cache.clear()
 
     def test_form_valid_data(self):
         """Test form accepts valid data"""
@@ -165,6 +267,45 @@ class TradeFormTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn('quantity', form.errors)
 
+    def test_form_save_reuses_symbol(self):
+        """Test saving trades on the same symbol reuses one Symbol row"""
+        data = {
+            'symbol_input': 'msft',
+            'side': 'buy',
+            'quantity': 100,
+            'entry_price': 150.00,
+            'entry_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        }
+        trades = []
+        for _ in range(2):
+            form = TradeCreateForm(data=data, user=self.user)
+            self.assertTrue(form.is_valid())
+            trades.append(form.save(user=self.user))
+
+        self.assertEqual(Symbol.objects.filter(symbol='MSFT').count(), 1)
+        self.assertEqual(trades[0].symbol_id, trades[1].symbol_id)
+
+    def test_form_symbol_cache_cleared_on_rename(self):
+        """Test a renamed Symbol is no longer returned for its old ticker"""
+        with self.captureOnCommitCallbacks(execute=True):
+            symbol, created = get_or_create_symbol('TSLA')
+        self.assertTrue(created)
+
+        symbol.symbol = 'TSLQ'
+        symbol.save()
+
+        new_symbol, created = get_or_create_symbol('TSLA')
+        self.assertTrue(created)
+        self.assertNotEqual(new_symbol.pk, symbol.pk)
+        self.assertEqual(new_symbol.symbol, 'TSLA')
+
+    def test_form_mistake_choices_refresh(self):
+        """Test new mistakes appear in the cached form choices"""
+        TradeCreateForm()
+        mistake = Mistake.objects.create(name='Test Mistake', category='other')
+        form = TradeCreateForm()
+        self.assertIn((mistake.id, 'Test Mistake'), form.fields['mistakes'].choices)
+
 
 class MistakeModelTest(TestCase):
     """Test Mistake model validation"""
@@ -179,4 +320,265 @@ class MistakeModelTest(TestCase):
         """Test that category must be valid"""
         with self.assertRaises(ValidationError):
             mistake = Mistake(name='Test Mistake', category='invalid')
-            mistake.full_clean()
\ No newline at end of file
+            mistake.full_clean()
+
+    def test_populate_mistakes_is_idempotent(self):
+        """Test that re-running populate_mistakes creates no duplicates"""
+        call_command('populate_mistakes', stdout=StringIO())
+        count = Mistake.objects.count()
+        self.assertGreater(count, 0)
+
+        out = StringIO()
+        call_command('populate_mistakes', stdout=out)
+        self.assertEqual(Mistake.objects.count(), count)
+        self.assertIn('Successfully populated 0 trading mistakes', out.getvalue())
+
+
+class SymbolModelTest(TestCase):
+    """Test Symbol model normalization"""
+
+    def test_symbol_normalized_on_save(self):
+        """Test that symbols are stored stripped and uppercased"""
+        symbol = Symbol.objects.create(symbol=' btc-usd ')
+        symbol.refresh_from_db()
+        self.assertEqual(symbol.symbol, 'BTC-USD')
+
+
+class TradeListViewTest(TestCase):
+    """Test the cached trade_list fragment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass')
+        cls.symbol = Symbol.objects.create(symbol='AAPL', name='Apple Inc.')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_trade_list_cache_invalidated_on_save(self):
+        """Test a new trade shows up despite the cached fragment"""
+        url = reverse('journal:trade_list')
+        self.assertContains(self.client.get(url), 'No trades found')
+
+        Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        response = self.client.get(url)
+        self.assertNotContains(response, 'No trades found')
+        self.assertContains(response, 'AAPL')
+
+    def test_trade_list_cache_invalidated_on_queryset_update(self):
+        """Test a bulk QuerySet.update() refreshes the cached fragment"""
+        Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        url = reverse('journal:trade_list')
+        self.assertContains(self.client.get(url), '<span class="status-open">Open</span>', html=True)
+
+        Trade.objects.filter(user=self.user).update(exit_price=110.00, exit_date=timezone.now())
+        response = self.client.get(url)
+        self.assertContains(response, '<span class="status-closed">Closed</span>', html=True)
+        self.assertNotContains(response, '<span class="status-open">Open</span>', html=True)
+        self.assertContains(response, '$1000.00')
+
+    def test_trade_list_cache_invalidated_on_rename(self):
+        """Test renaming a Symbol or Mistake refreshes the cached fragment"""
+        mistake = Mistake.objects.create(name='Late entry', category='entry')
+        trade = Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        trade.mistakes.add(mistake)
+        url = reverse('journal:trade_list')
+        self.assertContains(self.client.get(url), '<strong>AAPL</strong>', html=True)
+
+        self.symbol.symbol = 'AAPL2'
+        self.symbol.save()
+        mistake.name = 'Chased entry'
+        mistake.save()
+        response = self.client.get(url)
+        self.assertContains(response, '<strong>AAPL2</strong>', html=True)
+        self.assertContains(response, 'Chased entry')
+        self.assertNotContains(response, 'Late entry')
+
+        mistake.delete()
+        self.assertNotContains(self.client.get(url), 'Chased entry')
+
+    def test_trade_list_symbol_dropdown_refreshed(self):
+        """Test the cached symbol dropdown follows save() and QuerySet.update()"""
+        Trade.objects.create(
+            user=self.user,
+            symbol=self.symbol,
+            side='buy',
+            quantity=100,
+            entry_price=100.00,
+            entry_date=timezone.now()
+        )
+        url = reverse('journal:trade_list')
+        self.assertContains(self.client.get(url), '<option value="AAPL">AAPL</option>', html=True)
+
+        msft = Symbol.objects.create(symbol='MSFT')
+        Trade.objects.filter(user=self.user).update(symbol=msft)
+        response = self.client.get(url)
+        self.assertContains(response, '<option value="MSFT">MSFT</option>', html=True)
+        self.assertNotContains(response, '<option value="AAPL">AAPL</option>', html=True)
+
+    def test_trade_list_date_range(self):
+        """Test start/end dates select whole days on the raw entry timestamp"""
+        entry_dates = [
+            datetime(2024, 3, 1, 23, 59, tzinfo=dt_timezone.utc),
+            datetime(2024, 3, 2, 0, 0, tzinfo=dt_timezone.utc),
+            datetime(2024, 3, 2, 23, 59, 59, tzinfo=dt_timezone.utc),
+            datetime(2024, 3, 3, 0, 0, tzinfo=dt_timezone.utc),
+        ]
+        for entry_date in entry_dates:
+            Trade.objects.create(
+                user=self.user,
+                symbol=self.symbol,
+                side='buy',
+                quantity=100,
+                entry_price=100.00,
+                entry_date=entry_date
+            )
+        url = reverse('journal:trade_list')
+
+        def listed(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(trade.entry_date for trade in response.context['trades'])
+
+        self.assertEqual(listed({'start_date': '2024-03-02', 'end_date': '2024-03-02'}), entry_dates[1:3])
+        self.assertEqual(listed({'start_date': '2024-03-02'}), entry_dates[1:])
+        self.assertEqual(listed({'end_date': '2024-03-02'}), entry_dates[:3])
+        # Invalid dates are ignored rather than raising
+        self.assertEqual(listed({'start_date': 'bogus', 'end_date': '2024-13-01'}), entry_dates)
+        # The last representable date has no next day to bound against
+        self.assertEqual(listed({'end_date': '9999-12-31'}), entry_dates)
+
+
+class AnalyticsCommandTest(TestCase):
+    """Test the analytics management command output"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # run_analytics.py always reports on user0
+        cls.user = User.objects.create_user(username='user0', password='testpass')
+        other_user = User.objects.create_user(username='other', password='testpass')
+        symbol = Symbol.objects.create(symbol='AAPL', name='Apple Inc.')
+
+        fomo = Mistake.objects.create(name='FOMO trading', category='psychology')
+        revenge = Mistake.objects.create(name='Revenge trading', category='psychology')
+        late_entry = Mistake.objects.create(name='Late entry', category='entry')
+        early_exit = Mistake.objects.create(name='Early exit', category='exit')
+        oversized = Mistake.objects.create(name='Oversized position', category='position')
+
+        now = timezone.now()
+        trades = [
+            # (user, side, quantity, entry_price, exit_price, mistakes)
+            (cls.user, 'buy', 10, 100, 110, [fomo, late_entry]),   # +100
+            (cls.user, 'sell', 10, 100, 105, [revenge, late_entry]),  # -50
+            (cls.user, 'buy', 5, 100, 110, [early_exit]),   # +50
+            (cls.user, 'buy', 10, 100, None, [fomo]),   # open
+            (cls.user, 'sell', 2, 50, 40, []),   # +20
+            (other_user, 'buy', 10, 100, 90, [fomo, oversized]),
+        ]
+        for user, side, quantity, entry_price, exit_price, mistakes in trades:
+            trade = Trade.objects.create(
+                user=user,
+                symbol=symbol,
+                side=side,
+                quantity=quantity,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                entry_date=now,
+                exit_date=now if exit_price else None
+            )
+            trade.mistakes.set(mistakes)
+
+    def setUp(self):
+        cache.clear()
+
+    def run_command(self):
+        out = StringIO()
+        call_command('analytics', user='user0', stdout=out)
+        return self.lines(out)
+
+    def lines(self, out):
+        return [line.strip() for line in out.getvalue().splitlines() if line.strip()]
+
+    def test_analytics_output(self):
+        """Test rule-followed, emotion and mistake frequency sections"""
+        lines = self.run_command()
+
+        def section(title, end=None):
+            start = lines.index(title) + 1
+            return lines[start:lines.index(end) if end else None]
+
+        self.assertEqual(section('1. RULE-FOLLOWED VS RULE-BROKEN P&L ANALYSIS', '2. EMOTION VS WIN RATE ANALYSIS'), [
+            'Closed trades (Rule-followed): 4 trades, P&L: $120.00',
+            'Open trades (Rule-broken): 1 trades, Unrealized P&L: $0.00',
+            'Average P&L per closed trade: $30.00',
+            'Rule compliance rate: 80.0%',
+        ])
+        self.assertEqual(section('2. EMOTION VS WIN RATE ANALYSIS', '3. MISTAKE FREQUENCY ANALYSIS'), [
+            'Emotional trades: 3 total, 2 closed, 1 wins (50.0% win rate)',
+            'Non-emotional trades: 2 total, 2 closed, 2 wins (100.0% win rate)',
+            'Win rate difference: -50.0% (emotional vs non-emotional)',
+        ])
+        # Ties on frequency are ordered by category, then name
+        self.assertEqual(section('Top 10 most frequent mistakes:', 'Mistakes by category:'), [
+            '1. Late entry (Entry Timing)',
+            'Frequency: 2 trades, Avg P&L: $25.00, Total P&L: $50.00',
+            '2. FOMO trading (Psychology/Emotion)',
+            'Frequency: 2 trades, Avg P&L: $100.00, Total P&L: $100.00',
+            '3. Early exit (Exit Timing)',
+            'Frequency: 1 trades, Avg P&L: $50.00, Total P&L: $50.00',
+            '4. Revenge trading (Psychology/Emotion)',
+            'Frequency: 1 trades, Avg P&L: $-50.00, Total P&L: $-50.00',
+        ])
+        self.assertEqual(section('Mistakes by category:'), [
+            'Psychology/Emotion: 3 occurrences, Avg P&L: $16.67',
+            'Entry Timing: 2 occurrences, Avg P&L: $25.00',
+            'Exit Timing: 1 occurrences, Avg P&L: $50.00',
+        ])
+
+    def test_analytics_query_count(self):
+        """Test the number of queries the command runs for one user"""
+        with self.assertNumQueries(9):
+            self.run_command()
+
+    def test_run_analytics_script(self):
+        """Test run_analytics.py reports the same figures as the command"""
+        from run_analytics import run_analytics
+
+        out = StringIO()
+        with redirect_stdout(out), self.assertNumQueries(8):
+            run_analytics()
+        lines = self.lines(out)
+
+        self.assertIn('Total trades: 5', lines)
+        self.assertIn('Closed trades (Rule-followed): 4 trades, P&L: $120.00', lines)
+        self.assertIn('Emotional trades: 3 total, 2 closed, 1 wins (50.0% win rate)', lines)
+        self.assertIn('Non-emotional trades: 2 total, 2 closed, 2 wins (100.0% win rate)', lines)
+        top = lines.index('Top 5 most frequent mistakes:') + 1
+        self.assertEqual(lines[top:top + 8:2], [
+            '1. Late entry (Entry Timing)',
+            '2. FOMO trading (Psychology/Emotion)',
+            '3. Early exit (Exit Timing)',
+            '4. Revenge trading (Psychology/Emotion)',
+        ])
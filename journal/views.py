@@ -1,10 +1,26 @@
+import datetime
+import functools
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import models
+from django.db.models.functions import Left
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import get_language
 from .forms import TradeCreateForm
+from .models import get_trade_list_version, get_user_symbols
+
+
+@functools.lru_cache(maxsize=None)
+def render_empty_form(form_class, language):
+    """
+    Return the HTML of an unbound form. It is the same for every GET request
+    in a given language, so it is built once instead of per request.
+    """
+    return form_class().as_p()
 
 
 def signup_view(request):
@@ -21,10 +37,11 @@ def signup_view(request):
             return redirect('journal:trade_list')  # Will create this view later
         else:
             messages.error(request, 'Please correct the errors below.')
+        form_html = form.as_p()
     else:
-        form = UserCreationForm()
+        form_html = render_empty_form(UserCreationForm, get_language())
 
-    return render(request, 'journal/signup.html', {'form': form})
+    return render(request, 'journal/signup.html', {'form_html': form_html})
 
 
 def login_view(request):
@@ -46,10 +63,11 @@ def login_view(request):
                 messages.error(request, 'Invalid username or password.')
         else:
             messages.error(request, 'Invalid username or password.')
+        form_html = form.as_p()
     else:
-        form = AuthenticationForm()
+        form_html = render_empty_form(AuthenticationForm, get_language())
 
-    return render(request, 'journal/login.html', {'form': form})
+    return render(request, 'journal/login.html', {'form_html': form_html})
 
 
 def logout_view(request):
@@ -105,15 +123,9 @@ def trade_update(request, trade_id):
     View for updating an existing trade.
     Only the trade owner can edit their trades.
     """
-    # Validate trade_id is a valid integer
-    try:
-        trade_id = int(trade_id)
-    except (ValueError, TypeError):
-        messages.error(request, 'Invalid trade ID.')
-        return redirect('journal:trade_list')
-
+    # trade_id is already an int (the URL pattern uses <int:trade_id>).
     # Get the trade, ensuring it belongs to the current user
-    trade = get_object_or_404(request.user.trades, id=trade_id)
+    trade = get_object_or_404(request.user.trades.select_related('symbol'), id=trade_id)
 
     if request.method == 'POST':
         form = TradeCreateForm(request.POST, instance=trade, user=request.user)
@@ -153,15 +165,9 @@ def trade_delete(request, trade_id):
     View for deleting a trade.
     Only the trade owner can delete their trades.
     """
-    # Validate trade_id is a valid integer
-    try:
-        trade_id = int(trade_id)
-    except (ValueError, TypeError):
-        messages.error(request, 'Invalid trade ID.')
-        return redirect('journal:trade_list')
-
+    # trade_id is already an int (the URL pattern uses <int:trade_id>).
     # Get the trade, ensuring it belongs to the current user
-    trade = get_object_or_404(request.user.trades, id=trade_id)
+    trade = get_object_or_404(request.user.trades.select_related('symbol'), id=trade_id)
 
     if request.method == 'POST':
         try:
@@ -207,13 +213,35 @@ def trade_list(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
+    # Compare the raw timestamp against a half-open range of local midnights
+    # rather than casting entry_date with __date, so the index can be used
+    tz = timezone.get_current_timezone()
+
     if start_date:
-        trades = trades.filter(entry_date__date__gte=start_date)
-        filters_applied.append(f"From {start_date}")
+        try:
+            start = datetime.date.fromisoformat(start_date)
+        except ValueError:
+            start = None
+        if start:
+            trades = trades.filter(
+                entry_date__gte=datetime.datetime.combine(start, datetime.time.min, tz)
+            )
+            filters_applied.append(f"From {start_date}")
 
     if end_date:
-        trades = trades.filter(entry_date__date__lte=end_date)
-        filters_applied.append(f"To {end_date}")
+        try:
+            end = datetime.date.fromisoformat(end_date)
+        except ValueError:
+            end = None
+        if end:
+            # There is no day after date.max, and nothing to exclude past it
+            if end < datetime.date.max:
+                trades = trades.filter(
+                    entry_date__lt=datetime.datetime.combine(
+                        end + datetime.timedelta(days=1), datetime.time.min, tz
+                    )
+                )
+            filters_applied.append(f"To {end_date}")
 
     # Symbol/Asset filter
     symbol_filter = request.GET.get('symbol')
@@ -231,33 +259,45 @@ def trade_list(request):
     rule_followed = request.GET.get('rule_followed')
     if rule_followed == 'yes':
         # Closed trades (both exit_price and exit_date present)
-        trades = trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
+        trades = trades.filter(is_closed=True)
         filters_applied.append("Rule followed: Yes (Closed)")
     elif rule_followed == 'no':
         # Open trades (either exit_price or exit_date missing)
-        trades = trades.filter(
-            models.Q(exit_price__isnull=True) | models.Q(exit_date__isnull=True)
-        )
+        trades = trades.filter(is_closed=False)
         filters_applied.append("Rule followed: No (Open)")
 
-    # Get unique symbols for the filter dropdown
-    user_symbols = request.user.trades.values_list(
-        'symbol__symbol', flat=True
-    ).distinct().order_by('symbol__symbol')
+    # Get unique symbols for the filter dropdown (cached per user)
+    user_symbols = get_user_symbols(request.user)
 
-    # Calculate summary statistics
-    closed_trades = trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-    total_pnl = sum((trade.pnl or 0) for trade in closed_trades)
+    def summarize():
+        """Calculate summary statistics in one query."""
+        stats = trades.aggregate(
+            total=models.Count('id'),
+            closed=models.Count('id', filter=models.Q(is_closed=True)),
+            total_pnl=models.Sum('pnl', filter=models.Q(is_closed=True)),
+        )
+        return {
+            'total_trades': stats['total'],
+            'closed_trades': stats['closed'],
+            'open_trades': stats['total'] - stats['closed'],
+            'total_pnl': stats['total_pnl'] or 0,
+        }
 
     context = {
-        'trades': trades.order_by('-entry_date'),  # Most recent first
+        # Most recent first. Load only the columns the table shows, and just
+        # enough of the notes for its 50-character preview.
+        'trades': trades.select_related('symbol').prefetch_related('mistakes').only(
+            'id', 'user', 'side', 'quantity', 'entry_price', 'entry_date',
+            'exit_price', 'exit_date', 'pnl', 'is_closed', 'symbol__symbol',
+        ).annotate(notes_preview=Left('notes', 51)).order_by('-entry_date'),
         'filters_applied': filters_applied,
         'user_symbols': user_symbols,
-        'total_trades': trades.count(),
-        'closed_trades': closed_trades.count(),
-        'open_trades': trades.count() - closed_trades.count(),
-        'total_pnl': total_pnl,
+        # Lazy like `trades`, so a cached render runs no queries
+        'stats': SimpleLazyObject(summarize),
         'filter_params': request.GET,  # For form repopulation
+        # The template caches the stats and table per user and filter set
+        'trade_list_version': get_trade_list_version(request.user),
+        'cache_params': sorted(request.GET.lists()),
     }
 
     return render(request, 'journal/trade_list.html', context)
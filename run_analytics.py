@@ -11,27 +11,42 @@ django.setup()
 
 from journal.models import Trade, Mistake
 from django.contrib.auth.models import User
-from django.db.models import Q, F
+from django.db import connection, transaction
+from django.db.models import Q, Count, Sum, Exists, OuterRef
 
 def run_analytics():
+    # Run every report query inside one read-only transaction. It must be the
+    # outermost one, or READ ONLY would leak into the caller's transaction.
+    with transaction.atomic(durable=True):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION READ ONLY')
+        _run_analytics()
+
+def _run_analytics():
     # Get user
     user = User.objects.get(username='user0')
 
     print('=== ANALYTICS QUERIES DEMONSTRATION ===')
     print(f'Analyzing data for user: {user.username}')
-    print(f'Total trades: {user.trades.count()}')
+    print(f'Total trades: {user.trades.cached_count()}')
 
     # 1. Rule-followed vs Rule-broken P&L Analysis
     print('\n1. RULE-FOLLOWED VS RULE-BROKEN P&L ANALYSIS')
     trades = user.trades.all()
 
-    closed_trades = trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-    closed_count = closed_trades.count()
-    closed_pnl = sum((trade.pnl or 0) for trade in closed_trades)
-
-    open_trades = trades.filter(Q(exit_price__isnull=True) | Q(exit_date__isnull=True))
-    open_count = open_trades.count()
-    open_pnl = sum((trade.pnl or 0) for trade in open_trades)
+    closed = Q(is_closed=True)
+    open_ = Q(is_closed=False)
+    stats = trades.aggregate(
+        closed_count=Count('id', filter=closed),
+        closed_pnl=Sum('pnl', filter=closed),
+        open_count=Count('id', filter=open_),
+        open_pnl=Sum('pnl', filter=open_),
+    )
+    closed_count = stats['closed_count']
+    closed_pnl = stats['closed_pnl'] or 0
+    open_count = stats['open_count']
+    open_pnl = stats['open_pnl'] or 0
 
     print(f'  Closed trades (Rule-followed): {closed_count} trades, P&L: ${closed_pnl:.2f}')
     print(f'  Open trades (Rule-broken): {open_count} trades, Unrealized P&L: ${open_pnl:.2f}')
@@ -48,31 +63,36 @@ def run_analytics():
     print('\n2. EMOTION VS WIN RATE ANALYSIS')
 
     emotional_mistakes = ['FOMO trading', 'Revenge trading', 'Overconfidence', 'Hesitation', 'Confirmation bias']
-    emotion_mistake_objects = Mistake.objects.filter(name__in=emotional_mistakes)
-
-    emotional_trades = trades.filter(mistakes__in=emotion_mistake_objects).distinct()
-    non_emotional_trades = trades.exclude(mistakes__in=emotion_mistake_objects).distinct()
-
-    def calculate_win_rate(trade_queryset):
-        closed = trade_queryset.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-        if closed.count() == 0:
-            return 0, 0
-
-        wins = closed.filter(
-            Q(side='buy', exit_price__gt=F('entry_price')) |
-            Q(side='sell', exit_price__lt=F('entry_price'))
-        ).count()
-
-        return wins, closed.count()
-
-    emotion_wins, emotion_total = calculate_win_rate(emotional_trades)
-    non_emotion_wins, non_emotion_total = calculate_win_rate(non_emotional_trades)
+    # Resolve the emotional mistakes to primary keys once, so the filter below
+    # is a plain IN (...) list rather than a nested subquery
+    emotion_ids = list(Mistake.objects.filter(name__in=emotional_mistakes).values_list('id', flat=True))
+
+    # Split trades on whether they carry an emotional mistake and count both
+    # groups (total, closed, wins) with one conditional aggregate
+    has_emotional_mistake = Exists(Trade.mistakes.through.objects.filter(
+        trade=OuterRef('pk'), mistake_id__in=emotion_ids
+    ))
+    emotional = Q(is_emotional=True)
+    non_emotional = Q(is_emotional=False)
+    closed = Q(is_closed=True)
+    win = Q(pnl__gt=0)  # quantity is always positive, so a profit means a win
+
+    stats = trades.annotate(is_emotional=has_emotional_mistake).aggregate(
+        emotion_count=Count('id', filter=emotional),
+        emotion_total=Count('id', filter=emotional & closed),
+        emotion_wins=Count('id', filter=emotional & closed & win),
+        non_emotion_count=Count('id', filter=non_emotional),
+        non_emotion_total=Count('id', filter=non_emotional & closed),
+        non_emotion_wins=Count('id', filter=non_emotional & closed & win),
+    )
+    emotion_wins, emotion_total = stats['emotion_wins'], stats['emotion_total']
+    non_emotion_wins, non_emotion_total = stats['non_emotion_wins'], stats['non_emotion_total']
 
     emotion_win_rate = (emotion_wins / emotion_total * 100) if emotion_total > 0 else 0
     non_emotion_win_rate = (non_emotion_wins / non_emotion_total * 100) if non_emotion_total > 0 else 0
 
-    print(f'  Emotional trades: {emotional_trades.count()} total, {emotion_total} closed, {emotion_wins} wins ({emotion_win_rate:.1f}% win rate)')
-    print(f'  Non-emotional trades: {non_emotional_trades.count()} total, {non_emotion_total} closed, {non_emotion_wins} wins ({non_emotion_win_rate:.1f}% win rate)')
+    print(f'  Emotional trades: {stats["emotion_count"]} total, {emotion_total} closed, {emotion_wins} wins ({emotion_win_rate:.1f}% win rate)')
+    print(f'  Non-emotional trades: {stats["non_emotion_count"]} total, {non_emotion_total} closed, {non_emotion_wins} wins ({non_emotion_win_rate:.1f}% win rate)')
 
     if emotion_total > 0 and non_emotion_total > 0:
         rate_diff = emotion_win_rate - non_emotion_win_rate
@@ -81,29 +101,29 @@ def run_analytics():
     # 3. Mistake Frequency Analysis
     print('\n3. MISTAKE FREQUENCY ANALYSIS')
 
-    mistake_stats = []
-    for mistake in Mistake.objects.all():
-        trade_count = trades.filter(mistakes=mistake).count()
-
-        if trade_count > 0:
-            mistake_trades = trades.filter(mistakes=mistake)
-            closed_mistake_trades = mistake_trades.exclude(exit_price__isnull=True).exclude(exit_date__isnull=True)
-
-            total_pnl = sum((trade.pnl or 0) for trade in closed_mistake_trades)
-            avg_pnl = total_pnl / closed_mistake_trades.count() if closed_mistake_trades.count() > 0 else 0
+    # Frequency and closed-trade P&L for the five most frequent mistakes in one query
+    closed_mistake_trades = Q(trades__is_closed=True)
+    mistakes = Mistake.objects.filter(trades__user=user).annotate(
+        frequency=Count('trades', distinct=True),
+        closed_count=Count('trades', filter=closed_mistake_trades, distinct=True),
+        total_pnl=Sum('trades__pnl', filter=closed_mistake_trades),
+    ).order_by('-frequency', 'category', 'name')[:5]
 
-            mistake_stats.append({
-                'name': mistake.name,
-                'category': mistake.get_category_display(),
-                'frequency': trade_count,
-                'avg_pnl': avg_pnl,
-                'total_pnl': total_pnl
-            })
-
-    mistake_stats.sort(key=lambda x: x['frequency'], reverse=True)
+    mistake_stats = []
+    for mistake in mistakes:
+        total_pnl = mistake.total_pnl or 0
+        avg_pnl = total_pnl / mistake.closed_count if mistake.closed_count > 0 else 0
+
+        mistake_stats.append({
+            'name': mistake.name,
+            'category': mistake.get_category_display(),
+            'frequency': mistake.frequency,
+            'avg_pnl': avg_pnl,
+            'total_pnl': total_pnl
+        })
 
     print('  Top 5 most frequent mistakes:')
-    for i, stat in enumerate(mistake_stats[:5], 1):
+    for i, stat in enumerate(mistake_stats, 1):
         print(f'    {i}. {stat["name"]} ({stat["category"]})')
         print(f'       Frequency: {stat["frequency"]} trades, Avg P&L: ${stat["avg_pnl"]:.2f}, Total P&L: ${stat["total_pnl"]:.2f}')
 